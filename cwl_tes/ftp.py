@@ -1,26 +1,76 @@
 """FTP support"""
 from __future__ import absolute_import
 
-import contextlib
 import fnmatch
+import functools
 import ftplib
+import io
 import pycurl
 import logging
 import netrc
-import glob
 import os
+import posixpath
+import re
+import socket
+import threading
+import time
+import urllib.parse
 from typing import List, Text  # noqa F401 # pylint: disable=unused-import
 
-from six import PY2
-from six.moves import urllib
 from schema_salad.ref_resolver import uri_file_path
-from typing import Tuple, Optional
+from typing import Any, Callable, Dict, Set, Tuple, Optional  # noqa F401
 from tempfile import NamedTemporaryFile
 from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 
 from cwltool.stdfsaccess import StdFsAccess
 from cwltool.loghandler import _logger
 
+# Idle pooled connections older than this are probed with PWD before reuse
+FTP_IDLE_PROBE_SECONDS = 30
+# How long a positive isfile/isdir answer is trusted without asking again
+FTP_STAT_TTL_SECONDS = 5
+# Number of directories listed concurrently while expanding a glob
+FTP_GLOB_WORKERS = 8
+# Listed files smaller than this many bytes are prefetched for open();
+# off by default
+FTP_PREFETCH_UNDER = 0
+# Most files of one listing that are prefetched
+FTP_PREFETCH_MAX_FILES = 32
+# Connections a batch of concurrent curl transfers may open at once
+FTP_MAX_TRANSFER_CONNECTIONS = 8
+
+# Errors after which a pooled control connection is not reused
+_STALE_ERRORS = (EOFError, OSError, ftplib.error_temp)
+
+# Keepalive probes on control connections: start once a connection has been
+# idle long enough to be probed before reuse, then every 10s, give up after 3
+_TCP_KEEPALIVE_OPTIONS = (('TCP_KEEPIDLE', FTP_IDLE_PROBE_SECONDS),
+                          ('TCP_KEEPINTVL', 10),
+                          ('TCP_KEEPCNT', 3))
+
+# Hosts that answered MLST with 500/502, probed the pre-RFC 3659 way
+_NO_MLST_HOSTS = set()  # type: Set[Text]
+
+# Per-thread curl easy handle, reused so libcurl can keep connections open
+_CURL = threading.local()
+
+# DNS and TLS sessions shared by every curl handle. libcurl does not support
+# sharing a connection cache between threads transferring at the same time,
+# so connections are only reused by the per-thread handle and within a
+# multi handle
+_CURL_SHARE = pycurl.CurlShare()
+_CURL_SHARE.setopt(pycurl.SH_SHARE, pycurl.LOCK_DATA_DNS)
+_CURL_SHARE.setopt(pycurl.SH_SHARE, pycurl.LOCK_DATA_SSL_SESSION)
+
+# Same test as glob.has_magic, bound once
+_HAS_MAGIC = re.compile(r'[*?\[]').search
+
+# A URL scheme, matched the way urllib.parse.urlsplit recognizes one
+_URL_SCHEME = re.compile(r'([a-zA-Z][a-zA-Z0-9+.-]*):')
+
+_NETRC_CACHE = {}  # type: Dict[Tuple[Text, float], Optional[netrc.netrc]]
+
 
 @contextmanager
 def use_and_delete(fname, mode='r'):
@@ -35,9 +85,135 @@ def use_and_delete(fname, mode='r'):
         os.unlink(fname)
 
 
+def _new_curl():  # type: () -> pycurl.Curl
+    """A curl easy handle attached to the shared DNS and TLS caches."""
+    c = pycurl.Curl()
+    c.setopt(c.SHARE, _CURL_SHARE)
+    return c
+
+
+class _PipeReader(io.RawIOBase):
+    """
+    Read end of a pipe fed by _pump_to_pipe.
+
+    A failed download is raised as pycurl.error when the reader reaches the
+    end of the stream, instead of passing for a short file.
+    """
+    def __init__(self, r_fd):  # type: (int) -> None
+        super(_PipeReader, self).__init__()
+        self._fd = r_fd
+        self.error = None  # type: Optional[pycurl.error]
+
+    def readable(self):  # type: () -> bool
+        return True
+
+    def readinto(self, buf):  # type: (Any) -> int
+        data = os.read(self._fd, len(buf))
+        if not data and self.error is not None:
+            raise self.error
+        buf[:len(data)] = data
+        return len(data)
+
+    def close(self):  # type: () -> None
+        if not self.closed:
+            os.close(self._fd)
+        super(_PipeReader, self).close()
+
+
+def _pump_to_pipe(url, w_fd, reader):
+    # type: (Text, int, _PipeReader) -> None
+    """Download the URL into the write end of a pipe, then close it."""
+    def write(data):
+        view = memoryview(data)
+        try:
+            while view:
+                view = view[os.write(w_fd, view):]
+        except BrokenPipeError:
+            return 0  # Reader went away, make curl abort the transfer
+        return None
+
+    c = _new_curl()
+    try:
+        c.setopt(c.URL, url)
+        c.setopt(c.WRITEFUNCTION, write)
+        c.perform()
+        response_code = c.getinfo(c.RESPONSE_CODE)
+        if not (200 <= response_code <= 299):
+            print("There was a problem downloading " +
+                  f"{c.getinfo(c.EFFECTIVE_URL)} ({response_code})")
+    except pycurl.error as err:
+        reader.error = err
+    finally:
+        c.close()
+        os.close(w_fd)
+
+
+def _load_netrc():  # type: () -> Optional[netrc.netrc]
+    """
+    Return the parsed .netrc, re-reading it only when its mtime changes.
+
+    A file that fails to parse is cached as None so the error is logged once.
+    """
+    if 'HOME' in os.environ:
+        path = os.path.join(os.environ['HOME'], '.netrc')
+    else:
+        path = os.path.join(os.curdir, '.netrc')
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+    key = (path, mtime)
+    if key not in _NETRC_CACHE:
+        _NETRC_CACHE.clear()
+        try:
+            _NETRC_CACHE[key] = netrc.netrc(path)
+        except netrc.NetrcParseError as err:
+            _logger.debug(err)
+            _NETRC_CACHE[key] = None
+    return _NETRC_CACHE[key]
+
+
+@functools.lru_cache(maxsize=4096)
+def _cached_urlparse(url):  # type: (Text) -> urllib.parse.ParseResult
+    """urllib.parse.urlparse, memoized as URLs are re-parsed on every call."""
+    return urllib.parse.urlparse(url)
+
+
+@functools.lru_cache(maxsize=4096)
+def _url_credentials(url, netrc_obj):
+    # type: (Text, Optional[netrc.netrc]) -> Tuple[Text, Text, Text, Text]
+    """Split a URL into host, user, passwd and path, consulting .netrc."""
+    parse = _cached_urlparse(url)
+    user = parse.username
+    passwd = parse.password
+    if parse.scheme == 'ftp':
+        if not user and netrc_obj:
+            creds = netrc_obj.authenticators(parse.hostname)
+            if creds:
+                user, _, passwd = creds
+    return parse.hostname, user, passwd, parse.path
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_fnmatch(pat):  # type: (Text) -> Callable[[Text], Any]
+    """Compiled matcher for a glob pattern, case-sensitive like FTP paths."""
+    return re.compile(fnmatch.translate(pat)).match
+
+
+def _dir_key(host, path):  # type: (Text, Text) -> Tuple[Text, Text]
+    """Normalized (host, path) key of a remote entry in the stat caches."""
+    return host, '/' + path.strip('/')
+
+
 def abspath(src, basedir):  # type: (Text, Text) -> Text
     """http(s):, file:, ftp:, and plain path aware absolute path"""
-    scheme = urllib.parse.urlparse(src).scheme
+    if src.startswith(u"file:"):
+        scheme = u"file"
+    elif src.startswith((u"ftp:", u"http:", u"https:")):
+        return src
+    else:
+        match = _URL_SCHEME.match(src)
+        scheme = match.group(1).lower() if match else u""
     if scheme == u"file":
         apath = Text(uri_file_path(str(src)))
     elif scheme:
@@ -50,35 +226,123 @@ def abspath(src, basedir):  # type: (Text, Text) -> Text
     return apath
 
 
+class CurlTransfer(object):
+    """An upload or download queued on a CurlBatch."""
+    def __init__(self, batch, curl, action):
+        # type: (CurlBatch, pycurl.Curl, Text) -> None
+        self.batch = batch
+        self.curl = curl
+        self.action = action
+        self.done = False
+        self.error = None  # type: Optional[pycurl.error]
+        self.response_code = None  # type: Optional[int]
+
+    def result(self):  # type: () -> None
+        """Wait for the transfer, raising pycurl.error if it failed."""
+        while not self.done:
+            self.batch.perform_all()
+        if self.error is not None:
+            raise self.error
+
+
+class CurlBatch(object):
+    """Curl transfers driven concurrently on one multi handle."""
+    def __init__(self):  # type: () -> None
+        self._multi = pycurl.CurlMulti()
+        if hasattr(pycurl, 'M_MAX_TOTAL_CONNECTIONS'):  # libcurl >= 7.30
+            self._multi.setopt(pycurl.M_MAX_HOST_CONNECTIONS,
+                               FTP_MAX_TRANSFER_CONNECTIONS)
+            self._multi.setopt(pycurl.M_MAX_TOTAL_CONNECTIONS,
+                               FTP_MAX_TRANSFER_CONNECTIONS)
+        self._lock = threading.Lock()
+        self._transfers = {}  # type: Dict[pycurl.Curl, CurlTransfer]
+
+    def add(self, c, action):  # type: (pycurl.Curl, Text) -> CurlTransfer
+        """Queue a configured curl handle, run it with perform_all."""
+        transfer = CurlTransfer(self, c, action)
+        with self._lock:
+            self._transfers[c] = transfer
+            self._multi.add_handle(c)
+        return transfer
+
+    def _finish(self, c, error):
+        # type: (pycurl.Curl, Optional[pycurl.error]) -> None
+        self._multi.remove_handle(c)
+        transfer = self._transfers.pop(c)
+        if error is None:
+            response_code = c.getinfo(c.RESPONSE_CODE)
+            transfer.response_code = response_code
+            if not (200 <= response_code <= 299):
+                print(f"There was a problem {transfer.action} " +
+                      f"{c.getinfo(c.EFFECTIVE_URL)} ({response_code})")
+        c.close()
+        transfer.error = error
+        transfer.done = True
+
+    def perform_all(self):  # type: () -> None
+        """Run all queued transfers to completion."""
+        with self._lock:
+            active = True
+            while active:
+                ret, active = self._multi.perform()
+                if ret == pycurl.E_CALL_MULTI_PERFORM:
+                    continue
+                while True:
+                    queued, ok_list, err_list = self._multi.info_read()
+                    for c in ok_list:
+                        self._finish(c, None)
+                    for c, errno, errmsg in err_list:
+                        self._finish(c, pycurl.error(errno, errmsg))
+                    if not queued:
+                        break
+                if active:
+                    self._multi.select(1.0)
+
+    def close(self):  # type: () -> None
+        """Abandon the queued transfers, their result() raises."""
+        with self._lock:
+            for c in list(self._transfers):
+                self._finish(c, pycurl.error(
+                    pycurl.E_ABORTED_BY_CALLBACK, "Transfer abandoned"))
+            self._multi.close()
+
+
 class FtpFsAccess(StdFsAccess):
     """FTP access with upload."""
-    def __init__(self, basedir, cache=None, insecure=False):  # t:(Text)->None
+    def __init__(self, basedir, cache=None, insecure=False, host_creds=None,
+                 prefetch_under=FTP_PREFETCH_UNDER):
+        # type: (Text, Any, bool, Optional[Dict[Text, Any]], int) -> None
         super(FtpFsAccess, self).__init__(basedir)
-        self.cache = cache or {}
-        self.netrc = None
+        if cache is None:
+            cache = {}
+        if host_creds is None:
+            host_creds = {}
+        # host -> idle connections logged in with that host's credentials
+        self._pool = cache  # type: Dict[Text, List[ftplib.FTP]]
+        # host -> (user, passwd) of the first login made to it
+        self._pool_meta = host_creds  # type: Dict[Text, Tuple[Text, Text]]
+        # (host, directory) -> {name: MLSD facts}
+        self._stat_cache = \
+            {}  # type: Dict[Tuple[Text, Text], Dict[Text, Dict[Text, Text]]]
+        # (host, path) -> (is_file, is_dir, time of the lookup)
+        self._stat_mem = \
+            {}  # type: Dict[Tuple[Text, Text], Tuple[bool, bool, float]]
+        self.netrc = _load_netrc()
         self.insecure = insecure
-        try:
-            if 'HOME' in os.environ:
-                if os.path.exists(os.path.join(os.environ['HOME'], '.netrc')):
-                    self.netrc = netrc.netrc(
-                        os.path.join(os.environ['HOME'], '.netrc'))
-            elif os.path.exists(os.path.join(os.curdir, '.netrc')):
-                self.netrc = netrc.netrc(os.path.join(os.curdir, '.netrc'))
-        except netrc.NetrcParseError as err:
-            _logger.debug(err)
+        # Concurrent uploads and downloads, driven by perform_all(); the
+        # batches are only made once something is transferred
+        self._batch = None  # type: Optional[CurlBatch]
+        self._batch_lock = threading.Lock()
+        # Small files of the last listing are downloaded in a batch of
+        # their own on the first open() of any of them; 0 disables it
+        self.prefetch_under = prefetch_under
+        self._prefetch_batch = None  # type: Optional[CurlBatch]
+        self._file_cache = \
+            {}  # type: Dict[Text, Tuple[CurlTransfer, io.BytesIO]]
 
     def _parse_url(self, url):
         # type: (Text) -> Tuple[Optional[Text], Optional[Text]]
-        parse = urllib.parse.urlparse(url)
-        user = parse.username
-        passwd = parse.password
-        host = parse.hostname
-        path = parse.path
-        if parse.scheme == 'ftp':
-            if not user and self.netrc:
-                creds = self.netrc.authenticators(host)
-                if creds:
-                    user, _, passwd = creds
+        host, user, passwd, path = _url_credentials(url, self.netrc)
         if not user:
             user, passwd = self._recall_credentials(host)
             if passwd is None:
@@ -88,29 +352,112 @@ class FtpFsAccess(StdFsAccess):
 
         return host, user, passwd, path
 
-    def _connect(self, url):  # type: (Text) -> Optional[ftplib.FTP]
-        parse = urllib.parse.urlparse(url)
-        if parse.scheme == 'ftp':
-            host, user, passwd, _ = self._parse_url(url)
-            if (host, user, passwd) in self.cache:
-                if self.cache[(host, user, passwd)].pwd():
-                    return self.cache[(host, user, passwd)]
-            ftp = ftplib.FTP_TLS()
-            ftp.set_debuglevel(1 if _logger.isEnabledFor(logging.DEBUG) else 0)
-            ftp.connect(host)
+    def _connect(self, host, user, passwd, fresh=False):
+        # type: (Text, Text, Text, bool) -> ftplib.FTP
+        """Take an idle connection from the pool or dial a new one."""
+        if fresh:
+            idle = []
+        elif self._pool_meta.get(host, (user, passwd)) == (user, passwd):
+            idle = self._pool.setdefault(host, [])
+        else:  # Other credentials than the pooled ones, never pooled
+            idle = []
+        while True:
+            try:
+                ftp = idle.pop()
+            except IndexError:
+                break
+            if time.monotonic() - ftp.last_used <= FTP_IDLE_PROBE_SECONDS:
+                return ftp
+            try:
+                ftp.pwd()
+                return ftp
+            except ftplib.all_errors:
+                ftp.close()
+        ftp = ftplib.FTP_TLS()
+        ftp.set_debuglevel(1 if _logger.isEnabledFor(logging.DEBUG) else 0)
+        ftp.connect(host)
+        try:
+            # Keep idle pooled control connections (and NAT mappings) alive
+            ftp.sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            for name, value in _TCP_KEEPALIVE_OPTIONS:
+                if hasattr(socket, name):  # Not all of them on every OS
+                    ftp.sock.setsockopt(
+                        socket.IPPROTO_TCP, getattr(socket, name), value)
             ftp.login(user, passwd, secure=not self.insecure)
-            self.cache[(host, user, passwd)] = ftp
-            return ftp
-        return None
+            # Servers may refuse SIZE in ASCII mode
+            ftp.voidcmd('TYPE I')
+            ftp.binary = True
+            # Relative paths are resolved against the login directory, so
+            # that no command depends on where a pooled connection was left
+            ftp.home = ftp.pwd()
+        except BaseException:
+            ftp.close()
+            raise
+        self._pool_meta.setdefault(host, (user, passwd))
+        return ftp
+
+    def _release(self, host, user, passwd, ftp):
+        # type: (Text, Text, Text, ftplib.FTP) -> None
+        """Return a connection to the pool of idle connections."""
+        ftp.last_used = time.monotonic()
+        if self._pool_meta.get(host) == (user, passwd):
+            self._pool.setdefault(host, []).append(ftp)
+        else:
+            ftp.close()
+
+    @contextmanager
+    def _acquire(self, url, fresh=False):
+        """
+        Borrow a pooled FTP connection for the URL, or None if it isn't FTP.
+
+        The connection is returned to the pool afterwards unless the
+        control channel itself failed (including 4xx replies such as 421).
+        """
+        if _cached_urlparse(url).scheme != 'ftp':
+            yield None
+            return
+        host, user, passwd, _ = self._parse_url(url)
+        ftp = self._connect(host, user, passwd, fresh=fresh)
+        try:
+            yield ftp
+        except (ftplib.error_reply, ftplib.error_perm):
+            self._release(host, user, passwd, ftp)
+            raise
+        except BaseException:
+            ftp.close()
+            raise
+        self._release(host, user, passwd, ftp)
+
+    def _call(self, url, func):  # type: (Text, Callable[[Any], Any]) -> Any
+        """
+        Run func on a pooled FTP connection for the URL (None if not FTP).
+
+        A pooled connection can go stale between uses, so on a connection
+        error func is retried once on a freshly dialed connection.
+        """
+        try:
+            with self._acquire(url) as ftp:
+                return func(ftp)
+        except _STALE_ERRORS:
+            pass
+        with self._acquire(url, fresh=True) as ftp:
+            return func(ftp)
+
+    def _get_curl(self):  # type: () -> pycurl.Curl
+        """Return this thread's curl handle with all options reset."""
+        c = getattr(_CURL, 'handle', None)
+        if c is None:
+            c = _CURL.handle = _new_curl()
+        else:
+            c.reset()
+            c.setopt(c.SHARE, _CURL_SHARE)
+        return c
 
     def _abs(self, p):  # type: (Text) -> Text
         return abspath(p, self.basedir)
 
     def _recall_credentials(self, desired_host):
-        for host, user, passwd in self.cache:
-            if desired_host == host:
-                return user, passwd
-        return None, None
+        return self._pool_meta.get(desired_host, (None, None))
 
     def glob(self, pattern):  # type: (Text) -> List[Text]
         if not self.basedir.startswith("ftp:"):
@@ -129,17 +476,18 @@ class FtpFsAccess(StdFsAccess):
     def _glob1(self, pattern, basepath=None):
         try:
             names = self.listdir(basepath)
-        except ftplib.all_errors:
-            return []
+        except (ftplib.error_reply, ftplib.error_perm):
+            return []  # Missing or unreadable directory, nothing matches
         if pattern[0] != '.':
             names = filter(lambda x: x[0] != '.', names)
-        return fnmatch.filter(names, pattern)
+        match = _compile_fnmatch(pattern)
+        return [name for name in names if match(name)]
 
     def _glob(self, pattern):  # type: (Text) -> List[Text]
         if pattern.endswith("/."):
             pattern = pattern[:-1]
         dirname, basename = pattern.rsplit('/', 1)
-        if not glob.has_magic(pattern):
+        if _HAS_MAGIC(pattern) is None:
             if basename:
                 if self.exists(pattern):
                     return [pattern]
@@ -151,24 +499,49 @@ class FtpFsAccess(StdFsAccess):
             return self._glob1(basename)
 
         dirs = self._glob(dirname)
-        if glob.has_magic(basename):
+        if _HAS_MAGIC(basename) is not None:
             glob_in_dir = self._glob1
         else:
             glob_in_dir = self._glob0
         results = []
-        for dirname in dirs:
-            results.extend(glob_in_dir(basename, dirname))
+        if len(dirs) < 2:
+            for dirname in dirs:
+                results.extend(glob_in_dir(basename, dirname))
+            return results
+        with ThreadPoolExecutor(max_workers=FTP_GLOB_WORKERS) as executor:
+            for matches in executor.map(
+                    functools.partial(glob_in_dir, basename), dirs):
+                results.extend(matches)
         return results
 
-    def open(self, fn, mode):
+    def open(self, fn, mode, seekable=False):
+        """
+        Open an FTP file for reading.
+
+        The download is streamed through a pipe, so the handle can be read
+        before the transfer finishes but cannot seek. Pass seekable=True to
+        download to a temporary file first instead.
+        """
         if not fn.startswith("ftp:"):
             return super(FtpFsAccess, self).open(fn, mode)
         if 'r' in mode:
+            data = self._prefetched(fn)
+            if data is not None:
+                handle = io.BytesIO(data)
+                return handle if 'b' in mode else io.TextIOWrapper(handle)
             host, user, passwd, path = self._parse_url(fn)
             url = "ftp://{}:{}@{}/{}".format(user, passwd, host, path)
+            if not seekable:
+                r_fd, w_fd = os.pipe()
+                reader = _PipeReader(r_fd)
+                threading.Thread(target=_pump_to_pipe,
+                                 args=(url, w_fd, reader),
+                                 daemon=True).start()
+                handle = io.BufferedReader(reader)
+                return handle if 'b' in mode else io.TextIOWrapper(handle)
             # Get FTP file handle by temporarily downloading file
             with NamedTemporaryFile(mode='wb', delete=False) as dest:
-                c = pycurl.Curl()
+                c = self._get_curl()
                 c.setopt(c.URL, url)
                 c.setopt(c.WRITEDATA, dest)
                 c.perform()
@@ -176,68 +549,193 @@ class FtpFsAccess(StdFsAccess):
                 if not (200 <= response_code <= 299):
                     print("There was a problem downloading " +
                           f"{c.getinfo(c.EFFECTIVE_URL)} ({response_code})")
-                c.close()
                 temp_fname = dest.name
 
             # Return a file handle in read mode
-            handle = use_and_delete(temp_fname, mode)
-            if PY2:
-                return contextlib.closing(handle)
-            return handle
+            return use_and_delete(temp_fname, mode)
         raise Exception('Write mode FTP not implemented')
 
-    def exists(self, fn):  # type: (Text) -> bool
-        if not self.basedir.startswith("ftp:"):
-            return super(FtpFsAccess, self).exists(fn)
-        return self.isfile(fn) or self.isdir(fn)
+    def _stat_mlst(self, fn):  # type: (Text) -> Dict[Text, Text]
+        """Return the facts of an FTP URL from a single MLST (RFC 3659)."""
+        resp = self._call(
+            fn, lambda ftp: ftp.sendcmd("MLST " + _cached_urlparse(fn).path))
+        for line in resp.splitlines()[1:]:
+            if line.startswith(' '):
+                facts = line[1:].split(' ', 1)[0]
+                return dict(fact.lower().split('=', 1)
+                            for fact in facts.split(';') if '=' in fact)
+        return {}
+
+    def _cached_facts(self, fn):  # type: (Text) -> Optional[Dict[Text, Text]]
+        """Facts for a URL from an earlier MLSD listing of its parent."""
+        parse = _cached_urlparse(fn)
+        path = parse.path.rstrip('/')
+        listing = self._stat_cache.get(
+            _dir_key(parse.hostname, posixpath.dirname(path)))
+        if listing is None:
+            return None
+        return listing.get(posixpath.basename(path))
+
+    def _invalidate(self, host, path):  # type: (Text, Text) -> None
+        """Forget what is cached about a path and the directory holding it."""
+        parent = posixpath.dirname(path.rstrip('/'))
+        self._stat_cache.pop(_dir_key(host, parent), None)
+        self._stat_mem.pop(_dir_key(host, path), None)
+        self._stat_mem.pop(_dir_key(host, parent), None)
+
+    def _ftp_kind(self, fn, want=None):
+        # type: (Text, Optional[Text]) -> Optional[Text]
+        """
+        Classify an FTP URL as 'file', 'dir' or None if it is missing.
+
+        When the caller only cares whether the URL is a 'file' or a 'dir',
+        servers without MLST are only probed for that kind.
+        """
+        parse = _cached_urlparse(fn)
+        key = _dir_key(parse.hostname, parse.path)
+        now = time.monotonic()
+        entry = self._stat_mem.get(key)
+        if entry and now - entry[2] <= FTP_STAT_TTL_SECONDS:
+            return 'file' if entry[0] else 'dir'
+        kind = self._probe_kind(fn, want)
+        if kind:
+            self._stat_mem[key] = (kind == 'file', kind == 'dir', now)
+        return kind
+
+    def _probe_kind(self, fn, want):
+        # type: (Text, Optional[Text]) -> Optional[Text]
+        facts = self._cached_facts(fn)
+        if facts is None:
+            host = _cached_urlparse(fn).hostname
+            if host in _NO_MLST_HOSTS:
+                return self._legacy_kind(fn, want)
+            try:
+                facts = self._stat_mlst(fn)
+            except ftplib.error_perm as err:
+                code = str(err)[:3]
+                if code == '550':
+                    return None
+                if code not in ('500', '502'):
+                    raise
+                _NO_MLST_HOSTS.add(host)
+                return self._legacy_kind(fn, want)
+        kind = facts.get('type')
+        if kind == 'file':
+            return 'file'
+        if kind in ('dir', 'cdir', 'pdir'):
+            return 'dir'
+        # Symlinks (e.g. OS.unix=slink:/target) and other types say nothing
+        # about what they point to, so ask with SIZE and CWD
+        return self._legacy_kind(fn, want)
+
+    def _legacy_kind(self, fn, want):
+        # type: (Text, Optional[Text]) -> Optional[Text]
+        """Classify a URL on a server without MLST, with SIZE and CWD."""
+        if want != 'dir' and self._isfile_legacy(fn):
+            return 'file'
+        if want != 'file' and self._isdir_legacy(fn):
+            return 'dir'
+        return None
 
-    def isfile(self, fn):  # type: (Text) -> bool
-        ftp = self._connect(fn)
-        if ftp:
+    def _isfile_legacy(self, fn):  # type: (Text) -> bool
+        try:
+            self.size(fn)
+            return True
+        except ftplib.all_errors:
+            return False
+
+    def _isdir_legacy(self, fn):  # type: (Text) -> bool
+        def probe(ftp):
             try:
-                self.size(fn)
+                ftp.cwd(_cached_urlparse(fn).path)
                 return True
-            except ftplib.all_errors:
+            except (ftplib.error_reply, ftplib.error_perm):
                 return False
+        return self._call(fn, probe)
+
+    def exists(self, fn):  # type: (Text) -> bool
+        if not self.basedir.startswith("ftp:") or not fn.startswith("ftp:"):
+            return super(FtpFsAccess, self).exists(fn)
+        return self._ftp_kind(fn) is not None
+
+    def isfile(self, fn):  # type: (Text) -> bool
+        if fn.startswith("ftp:"):
+            return self._ftp_kind(fn, 'file') == 'file'
         return super(FtpFsAccess, self).isfile(fn)
 
     def isdir(self, fn):  # type: (Text) -> bool
-        ftp = self._connect(fn)
-        if ftp:
-            try:
-                cwd = ftp.pwd()
-                ftp.cwd(urllib.parse.urlparse(fn).path)
-                ftp.cwd(cwd)
-                return True
-            except ftplib.all_errors:
-                return False
+        if fn.startswith("ftp:"):
+            return self._ftp_kind(fn, 'dir') == 'dir'
         return super(FtpFsAccess, self).isdir(fn)
 
     def mkdir(self, url, recursive=True):
         """Make the directory specified in the URL."""
-        ftp = self._connect(url)
-        path = urllib.parse.urlparse(url).path
+        parse = _cached_urlparse(url)
+        path = parse.path
         if not recursive:
-            return ftp.mkd(path)
+            self._invalidate(parse.hostname, path)
+            return self._call(url, lambda ftp: ftp.mkd(path))
         dirs = [d for d in path.split('/') if d != '']
-        for index, _ in enumerate(dirs):
-            try:
-                ftp.mkd("/".join(dirs[:index+1])+'/')
-            except ftplib.all_errors:
-                pass
+
+        def make_missing(ftp):
+            # Find the deepest existing directory, then create the rest
+            paths = [posixpath.join(ftp.home, *dirs[:index+1])
+                     for index in range(len(dirs))]
+            existing = len(dirs)
+            while existing:
+                try:
+                    ftp.cwd(paths[existing - 1])
+                    break
+                except ftplib.error_perm:
+                    existing -= 1
+            for index in range(existing, len(dirs)):
+                self._invalidate(parse.hostname, "/".join(dirs[:index+1]))
+                try:
+                    ftp.mkd(paths[index] + '/')
+                except ftplib.error_perm:
+                    pass
+
+        self._call(url, make_missing)
         return None
 
     def listdir(self, fn):  # type: (Text) -> List[Text]
-        ftp = self._connect(fn)
-        if ftp:
-            host, username, passwd, path = self._parse_url(fn)
-            if username != "anonymous":
-                template = "ftp://{un}:{pw}@{0}/{1}"
-            else:
-                template = "ftp://{0}/{1}"
-            return [template.format(host, item, un=username, pw=passwd)
-                    for item in ftp.nlst(path)]
-        return super(FtpFsAccess, self).listdir(fn)
+        if _cached_urlparse(fn).scheme != 'ftp':
+            return super(FtpFsAccess, self).listdir(fn)
+        host, username, passwd, path = self._parse_url(fn)
+        if username != "anonymous":
+            prefix = f"ftp://{username}:{passwd}@{host}/"
+        else:
+            prefix = f"ftp://{host}/"
+
+        def list_entries(ftp):
+            ftp.binary = False  # ftplib sends TYPE A for listings
+            # An empty path lists the login directory, not the root
+            listed = path or ftp.home
+            if host not in _NO_MLST_HOSTS:
+                try:
+                    listing = {}
+                    for name, facts in ftp.mlsd(listed):
+                        if 'type' in facts:
+                            facts['type'] = facts['type'].lower()
+                        if facts.get('type') not in ('cdir', 'pdir'):
+                            listing[name] = facts
+                    return listed, listing, None
+                except ftplib.error_perm as err:
+                    if str(err)[:3] not in ('500', '502'):
+                        raise
+                    _NO_MLST_HOSTS.add(host)
+            # Server without MLSD
+            return listed, None, ftp.nlst(listed)
+
+        listed, listing, items = self._call(fn, list_entries)
+        if listing is not None:
+            self._stat_cache[_dir_key(host, listed)] = listing
+            dirpath = '/' + listed.strip('/')
+            items = [posixpath.join(dirpath, name) for name in listing]
+            if self.prefetch_under:
+                self._prefetch([(prefix + item, facts) for item, facts
+                                in zip(items, listing.values())])
+        return [prefix + item for item in items]
 
     def join(self, path, *paths):  # type: (Text, *Text) -> Text
         if path.startswith('ftp:'):
@@ -256,10 +754,28 @@ class FtpFsAccess(StdFsAccess):
         return os.path.realpath(path)
 
     def size(self, fn):
+        facts = self._cached_facts(fn)
+        if facts and facts.get('type') == 'file' and 'size' in facts:
+            return int(facts['size'])
+        if _cached_urlparse(fn).scheme == 'ftp':
+            def ftp_size(ftp):
+                if not ftp.binary:
+                    ftp.voidcmd('TYPE I')
+                    ftp.binary = True
+                return ftp.size(_cached_urlparse(fn).path)
+
+            # SIZE answers on the control channel; if the server refuses it
+            # fall back to a curl transfer
+            try:
+                size = self._call(fn, ftp_size)
+            except ftplib.all_errors:
+                size = None
+            if size is not None:
+                return size
         host, user, passwd, path = self._parse_url(fn)
         url = "ftp://{}:{}@{}/{}".format(user, passwd, host, path)
         try:
-            c = pycurl.Curl()
+            c = self._get_curl()
             c.setopt(c.URL, url)
 
             # Tell curl not to echo the downloaded contents to stdout. The
@@ -273,28 +789,87 @@ class FtpFsAccess(StdFsAccess):
         except Exception:
             return super(FtpFsAccess, self).size(fn)
 
-    def upload(self, file_handle, url):
-        """FtpFsAccess specific method to upload a file to the given URL."""
-        c = pycurl.Curl()
+    def perform_all(self):  # type: () -> None
+        """Run all queued uploads and downloads to completion."""
+        if self._batch is not None:
+            self._batch.perform_all()
+
+    def _transfer_batch(self):  # type: () -> CurlBatch
+        """The batch uploads and downloads are queued on."""
+        with self._batch_lock:
+            if self._batch is None:
+                self._batch = CurlBatch()
+            return self._batch
+
+    def _prefetch(self, entries):
+        # type: (List[Tuple[Text, Dict[Text, Text]]]) -> None
+        """
+        Queue downloads of the small files of a listing, see _prefetched.
+
+        Copies queued for an earlier listing that were never read are
+        dropped.
+        """
+        urls = [url for url, facts in entries
+                if facts.get('type') == 'file' and 'size' in facts
+                and int(facts['size']) < self.prefetch_under]
+        with self._batch_lock:
+            if self._prefetch_batch is not None:
+                self._prefetch_batch.close()
+                self._prefetch_batch = None
+            self._file_cache.clear()
+            if not urls:
+                return
+            batch = self._prefetch_batch = CurlBatch()
+            for url in urls[:FTP_PREFETCH_MAX_FILES]:
+                buf = io.BytesIO()
+                c = _new_curl()
+                c.setopt(c.URL, url)
+                c.setopt(c.WRITEDATA, buf)
+                self._file_cache[url] = (batch.add(c, "downloading"), buf)
+
+    def _prefetched(self, url):  # type: (Text) -> Optional[bytes]
+        """
+        Contents of a prefetched file, running the batch if needed.
+
+        Each prefetched copy is handed out once, later opens download anew.
+        """
+        entry = self._file_cache.pop(url, None)
+        if entry is None:
+            return None
+        transfer, buf = entry
+        try:
+            transfer.result()
+        except pycurl.error:
+            return None
+        if not (200 <= transfer.response_code <= 299):
+            return None
+        return buf.getvalue()
+
+    def upload_async(self, file_handle, url):
+        # type: (Any, Text) -> CurlTransfer
+        """Queue an upload of a file to the given URL, see perform_all."""
+        parse = _cached_urlparse(url)
+        self._invalidate(parse.hostname, parse.path)
+        self._file_cache.pop(url, None)
+        c = _new_curl()
         c.setopt(pycurl.URL, url)
         c.setopt(pycurl.VERBOSE, 1)
         c.setopt(pycurl.INFILE, file_handle)
         c.setopt(pycurl.UPLOAD, 1)
-        c.perform()
-        response_code = c.getinfo(c.RESPONSE_CODE)
-        if not (200 <= response_code <= 299):
-            print("There was a problem uploading " +
-                  f"{c.getinfo(c.EFFECTIVE_URL)} ({response_code})")
-        c.close()
+        return self._transfer_batch().add(c, "uploading")
 
-    def download(self, file_handle, url):
-        """FtpFsAccess specific method to download a file to the given URL."""
-        c = pycurl.Curl()
+    def download_async(self, file_handle, url):
+        # type: (Any, Text) -> CurlTransfer
+        """Queue a download of the given URL to a file, see perform_all."""
+        c = _new_curl()
         c.setopt(c.URL, url)
         c.setopt(c.WRITEDATA, file_handle)
-        c.perform()
-        response_code = c.getinfo(c.RESPONSE_CODE)
-        if not (200 <= response_code <= 299):
-            print("There was a problem downloading " +
-                  f"{c.getinfo(c.EFFECTIVE_URL)} ({response_code})")
-        c.close()
+        return self._transfer_batch().add(c, "downloading")
+
+    def upload(self, file_handle, url):
+        """FtpFsAccess specific method to upload a file to the given URL."""
+        self.upload_async(file_handle, url).result()
+
+    def download(self, file_handle, url):
+        """FtpFsAccess specific method to download a file to the given URL."""
+        self.download_async(file_handle, url).result()
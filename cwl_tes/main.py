@@ -167,12 +167,14 @@ def main(args=None):
     signal.signal(signal.SIGINT, signal_handler)
 
     ftp_cache = {}
+    ftp_host_creds = {}
 
     class CachingFtpFsAccess(FtpFsAccess):
         """Ensures that the FTP connection cache is shared."""
         def __init__(self, basedir, insecure=False):
             super(CachingFtpFsAccess, self).__init__(
-                basedir, ftp_cache, insecure=insecure)
+                basedir, ftp_cache, insecure=insecure,
+                host_creds=ftp_host_creds)
 
     ftp_fs_access = CachingFtpFsAccess(os.curdir,
                                        insecure=parsed_args.insecure)
@@ -0,0 +1,653 @@
+from __future__ import print_function, unicode_literals
+
+import ftplib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import pycurl
+
+from cwl_tes import ftp
+
+
+class StubServer(object):
+    """State shared by the stub connections dialed during one test."""
+
+    def __init__(self, dirs=(), files=None, links=None, mlst=True,
+                 mlst_error=None):
+        self.dirs = set(dirs) | {'/', '/home/u'}
+        self.files = files or {}  # path -> size
+        self.links = links or {}  # path -> target
+        self.mlst = mlst
+        self.mlst_error = mlst_error
+        self.connections = []
+        self.commands = []
+        self.made = []
+        self.errors = []  # raised by the next commands, in order
+
+    def entries(self, path):
+        path = '/' + '/'.join(part for part in path.split('/') if part)
+        prefix = path.rstrip('/') + '/'
+        names = {}
+        for entry in self.dirs:
+            if entry != path and entry.startswith(prefix) \
+                    and '/' not in entry[len(prefix):]:
+                names[entry[len(prefix):]] = {'type': 'dir'}
+        for entry, size in self.files.items():
+            if entry.startswith(prefix) and '/' not in entry[len(prefix):]:
+                names[entry[len(prefix):]] = {'type': 'File',
+                                              'size': str(size)}
+        for entry, target in self.links.items():
+            if entry.startswith(prefix) and '/' not in entry[len(prefix):]:
+                names[entry[len(prefix):]] = {
+                    'type': 'OS.unix=slink:' + target,
+                    'size': str(len(target))}
+        return names
+
+    def resolve(self, path):
+        return self.links.get(path.rstrip('/'), path)
+
+
+class StubFTP(object):
+    """The subset of ftplib.FTP_TLS used by FtpFsAccess."""
+    server = None  # type: StubServer
+
+    def __init__(self):
+        self.closed = False
+        self.server.connections.append(self)
+
+    def _command(self, *args):
+        self.server.commands.append(args)
+        if self.server.errors:
+            raise self.server.errors.pop(0)
+
+    def set_debuglevel(self, level):
+        pass
+
+    def connect(self, host):
+        self.sock = mock.Mock()
+
+    def login(self, user, passwd, secure=True):
+        self._command('login', user)
+
+    def voidcmd(self, cmd):
+        self._command('voidcmd', cmd)
+
+    def pwd(self):
+        self._command('pwd')
+        return '/home/u'
+
+    def cwd(self, path):
+        self._command('cwd', path)
+        if self.server.resolve(path).rstrip('/') not in self.server.dirs:
+            raise ftplib.error_perm('550 No such directory')
+
+    def mkd(self, path):
+        self._command('mkd', path)
+        self.server.made.append(path)
+        self.server.dirs.add(path.rstrip('/'))
+
+    def sendcmd(self, cmd):
+        self._command('sendcmd', cmd)
+        if self.server.mlst_error:
+            raise ftplib.error_perm(self.server.mlst_error)
+        path = cmd.split(' ', 1)[1]
+        if path.rstrip('/') in self.server.links:
+            facts = 'Type=OS.unix=slink:{};'.format(self.server.resolve(path))
+        elif path.rstrip('/') in self.server.dirs:
+            facts = 'Type=dir;Perm=el;'
+        elif path in self.server.files:
+            facts = 'Type=File;Size={};Modify=20190101000000;'.format(
+                self.server.files[path])
+        else:
+            raise ftplib.error_perm('550 No such file or directory')
+        return '250-Listing {0}\n {1} {0}\n250 End'.format(path, facts)
+
+    def mlsd(self, path):
+        self._command('mlsd', path)
+        if not self.server.mlst:
+            raise ftplib.error_perm('500 Unknown command')
+        yield '.', {'type': 'cdir'}
+        yield '..', {'type': 'pdir'}
+        for name, facts in sorted(self.server.entries(path).items()):
+            yield name, dict(facts)
+
+    def nlst(self, path):
+        self._command('nlst', path)
+        return [path.rstrip('/') + '/' + name
+                for name in sorted(self.server.entries(path))]
+
+    def size(self, path):
+        self._command('size', path)
+        path = self.server.resolve(path)
+        if path not in self.server.files:
+            raise ftplib.error_perm('550 No such file')
+        return self.server.files[path]
+
+    def close(self):
+        self.closed = True
+
+
+class StubCurl(object):
+    """A curl easy handle answering from a table of canned responses."""
+    URL = pycurl.URL
+    WRITEDATA = pycurl.WRITEDATA
+    WRITEFUNCTION = pycurl.WRITEFUNCTION
+    RESPONSE_CODE = pycurl.RESPONSE_CODE
+    EFFECTIVE_URL = pycurl.EFFECTIVE_URL
+
+    def __init__(self, responses):
+        self.responses = responses  # url -> (body, response code)
+        self.opts = {}
+        self.closed = False
+
+    def setopt(self, option, value):
+        self.opts[option] = value
+
+    def getinfo(self, info):
+        if info == self.RESPONSE_CODE:
+            return self.responses[self.opts[self.URL]][1]
+        return self.opts[self.URL]
+
+    def perform(self):
+        response = self.responses.get(self.opts[self.URL])
+        if response is None:
+            raise pycurl.error(78, 'RETR response: 550')
+        if self.WRITEDATA in self.opts:
+            self.opts[self.WRITEDATA].write(response[0])
+        elif self.WRITEFUNCTION in self.opts:
+            for offset in range(0, len(response[0]), 4):
+                if self.opts[self.WRITEFUNCTION](
+                        response[0][offset:offset + 4]) == 0:
+                    raise pycurl.error(23, 'Failed writing received data')
+
+    def close(self):
+        self.closed = True
+
+
+class StubMulti(object):
+    """A curl multi handle running its transfers one after another."""
+    instances = []
+
+    def __init__(self):
+        self.options = {}
+        self.closed = False
+        self.handles = []
+        self.finished = ([], [])
+        self.instances.append(self)
+
+    def setopt(self, option, value):
+        self.options[option] = value
+
+    def add_handle(self, c):
+        self.handles.append(c)
+
+    def remove_handle(self, c):
+        self.handles.remove(c)
+
+    def perform(self):
+        for c in self.handles:
+            if c in self.finished[0] or \
+                    c in [failed[0] for failed in self.finished[1]]:
+                continue
+            try:
+                c.perform()
+                self.finished[0].append(c)
+            except pycurl.error as err:
+                self.finished[1].append((c, err.args[0], err.args[1]))
+        return 0, 0
+
+    def info_read(self):
+        ok_list, err_list = self.finished
+        self.finished = ([], [])
+        return 0, ok_list, err_list
+
+    def select(self, timeout):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class FtpFsAccessTest(unittest.TestCase):
+
+    def setUp(self):
+        ftp._NO_MLST_HOSTS.clear()
+        patcher = mock.patch.object(ftp.ftplib, 'FTP_TLS', StubFTP)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(ftp._NO_MLST_HOSTS.clear)
+
+    def make_fs(self, **kwargs):
+        self.server = StubFTP.server = StubServer(**kwargs)
+        fs = ftp.FtpFsAccess('ftp://host/', prefetch_under=0)
+        fs.netrc = None
+        return fs
+
+    def sent(self, name):
+        return [cmd for cmd in self.server.commands if cmd[0] == name]
+
+    def test_mlst_facts(self):
+        fs = self.make_fs(dirs={'/data'}, files={'/data/f.txt': 12})
+        self.assertEqual(
+            fs._stat_mlst('ftp://host/data/f.txt'),
+            {'type': 'file', 'size': '12', 'modify': '20190101000000'})
+        self.assertTrue(fs.isfile('ftp://host/data/f.txt'))
+        self.assertFalse(fs.isdir('ftp://host/data/f.txt'))
+        self.assertTrue(fs.isdir('ftp://host/data'))
+        self.assertFalse(self.sent('cwd'))
+        self.assertFalse(self.sent('size'))
+
+    def test_missing(self):
+        fs = self.make_fs()
+        self.assertFalse(fs.exists('ftp://host/nothing'))
+        self.assertNotIn('host', ftp._NO_MLST_HOSTS)
+        self.assertFalse(self.sent('cwd'))
+
+    def test_no_mlst_falls_back(self):
+        for code in ('500', '502'):
+            with self.subTest(code=code):
+                ftp._NO_MLST_HOSTS.clear()
+                fs = self.make_fs(dirs={'/data'}, files={'/data/f.txt': 3},
+                                  mlst_error=code + ' Unknown command')
+                self.assertTrue(fs.isdir('ftp://host/data'))
+                self.assertIn('host', ftp._NO_MLST_HOSTS)
+                self.assertTrue(fs.isfile('ftp://host/data/f.txt'))
+                # MLST is not tried again on a host known to lack it
+                self.assertEqual(len(self.sent('sendcmd')), 1)
+                # isdir and isfile only send the probe for their own kind
+                self.assertEqual(self.sent('cwd'), [('cwd', '/data')])
+                self.assertEqual(self.sent('size'),
+                                 [('size', '/data/f.txt')])
+
+    def test_symlinks_are_probed(self):
+        fs = self.make_fs(dirs={'/data', '/data/real'},
+                          files={'/data/f.txt': 3},
+                          links={'/data/linked': '/data/real',
+                                 '/data/g.txt': '/data/f.txt'})
+        self.assertTrue(fs.isdir('ftp://host/data/linked'))
+        self.assertFalse(fs.isfile('ftp://host/data/linked'))
+        self.assertTrue(fs.isfile('ftp://host/data/g.txt'))
+        self.assertFalse(fs.isdir('ftp://host/data/g.txt'))
+        self.assertNotIn('host', ftp._NO_MLST_HOSTS)
+
+    def test_positive_answers_expire(self):
+        fs = self.make_fs(dirs={'/data'})
+        clock = [1000.0]
+        with mock.patch.object(ftp, 'time') as fake_time:
+            fake_time.monotonic.side_effect = lambda: clock[0]
+            self.assertTrue(fs.isdir('ftp://host/data'))
+            self.assertTrue(fs.isdir('ftp://host/data/'))
+            self.assertFalse(fs.isfile('ftp://host/data'))
+            self.assertEqual(len(self.sent('sendcmd')), 1)
+            clock[0] += ftp.FTP_STAT_TTL_SECONDS + 1
+            self.assertTrue(fs.isdir('ftp://host/data'))
+            self.assertEqual(len(self.sent('sendcmd')), 2)
+            # Missing paths are asked about every time
+            self.assertFalse(fs.exists('ftp://host/nothing'))
+            self.assertFalse(fs.exists('ftp://host/nothing'))
+            self.assertEqual(len(self.sent('sendcmd')), 4)
+
+    def test_other_mlst_errors_raise(self):
+        fs = self.make_fs(mlst_error='530 Not logged in')
+        with self.assertRaises(ftplib.error_perm):
+            fs.exists('ftp://host/data')
+        self.assertNotIn('host', ftp._NO_MLST_HOSTS)
+
+    def test_pool_keeps_connection_after_error_reply(self):
+        fs = self.make_fs()
+        self.assertFalse(fs.exists('ftp://host/nothing'))
+        self.assertFalse(fs.exists('ftp://host/other'))
+        self.assertEqual(len(self.server.connections), 1)
+        self.assertEqual(fs._pool['host'], self.server.connections)
+        self.assertFalse(self.server.connections[0].closed)
+
+    def test_stale_connection_is_replaced(self):
+        for error in (EOFError(), ftplib.error_temp('421 Timeout')):
+            with self.subTest(error=error):
+                fs = self.make_fs(dirs={'/data'})
+                self.assertTrue(fs.exists('ftp://host/data'))
+                stale = self.server.connections[0]
+                fs._stat_mem.clear()
+                self.server.errors.append(error)
+                self.assertTrue(fs.exists('ftp://host/data'))
+                self.assertTrue(stale.closed)
+                self.assertEqual(len(self.server.connections), 2)
+                self.assertEqual(fs._pool['host'],
+                                 [self.server.connections[1]])
+
+    def test_failed_login_closes_connection(self):
+        fs = self.make_fs(dirs={'/data'})
+        self.server.errors.append(ftplib.error_perm('530 Login incorrect'))
+        with self.assertRaises(ftplib.error_perm):
+            fs.exists('ftp://host/data')
+        self.assertTrue(self.server.connections[0].closed)
+        self.assertEqual(fs._pool.get('host', []), [])
+
+    def test_keepalive_options_missing_on_some_platforms(self):
+        fake_socket = mock.Mock(spec=['SOL_SOCKET', 'SO_KEEPALIVE',
+                                      'IPPROTO_TCP', 'TCP_KEEPIDLE'])
+        fs = self.make_fs(dirs={'/data'})
+        with mock.patch.object(ftp, 'socket', fake_socket):
+            self.assertTrue(fs.exists('ftp://host/data'))
+        setsockopt = self.server.connections[0].sock.setsockopt
+        self.assertEqual(setsockopt.call_args_list, [
+            mock.call(fake_socket.SOL_SOCKET, fake_socket.SO_KEEPALIVE, 1),
+            mock.call(fake_socket.IPPROTO_TCP, fake_socket.TCP_KEEPIDLE,
+                      ftp.FTP_IDLE_PROBE_SECONDS)])
+
+    def test_listdir_mlsd(self):
+        fs = self.make_fs(dirs={'/data', '/data/sub'},
+                          files={'/data/f.txt': 5})
+        self.assertEqual(sorted(fs.listdir('ftp://host//data/')),
+                         ['ftp://host//data/f.txt', 'ftp://host//data/sub'])
+        # Answered from the cached listing
+        self.assertTrue(fs.isfile('ftp://host/data/f.txt'))
+        self.assertTrue(fs.isdir('ftp://host/data/sub'))
+        self.assertEqual(fs.size('ftp://host/data/f.txt'), 5)
+        self.assertFalse(self.sent('sendcmd'))
+
+    def test_listdir_nlst_fallback(self):
+        fs = self.make_fs(dirs={'/data'}, files={'/data/f.txt': 5},
+                          mlst=False)
+        self.assertEqual(fs.listdir('ftp://host/data'),
+                         ['ftp://host//data/f.txt'])
+        self.assertIn('host', ftp._NO_MLST_HOSTS)
+        fs.listdir('ftp://host/data')
+        self.assertEqual(len(self.sent('mlsd')), 1)
+
+    def test_listdir_login_directory(self):
+        fs = self.make_fs(files={'/home/u/x.txt': 1, '/x.txt': 2})
+        self.assertEqual(fs.listdir('ftp://host'),
+                         ['ftp://host//home/u/x.txt'])
+        self.assertEqual(fs.size('ftp://host//home/u/x.txt'), 1)
+        self.assertFalse(self.sent('sendcmd'))
+        # The root directory was not listed
+        self.assertEqual(fs.size('ftp://host/x.txt'), 2)
+        self.assertEqual(self.sent('size'), [('size', '/x.txt')])
+
+    def test_size_of_listed_symlink_is_asked(self):
+        fs = self.make_fs(dirs={'/data'}, files={'/data/f.txt': 3},
+                          links={'/data/g.txt': '/data/f.txt'})
+        fs.listdir('ftp://host/data')
+        self.assertEqual(fs.size('ftp://host/data/g.txt'), 3)
+        self.assertEqual(self.sent('size'), [('size', '/data/g.txt')])
+
+    def test_glob_lists_directories_concurrently(self):
+        fs = self.make_fs(dirs={'/data', '/data/a', '/data/b', '/data/c'},
+                          files={'/data/a/f.txt': 1, '/data/b/g.txt': 1,
+                                 '/data/b/h.dat': 1})
+        self.assertEqual(sorted(fs.glob('ftp://host/data/*/*.txt')),
+                         ['ftp://host//data/a/f.txt',
+                          'ftp://host//data/b/g.txt'])
+        self.assertEqual(fs.glob('ftp://host/nothing/*'), [])
+
+    def test_glob_raises_connection_errors(self):
+        fs = self.make_fs(dirs={'/data'})
+        self.assertTrue(fs.isdir('ftp://host/data'))
+        # Listing fails on the pooled and on the freshly dialed connection
+        self.server.errors.extend(
+            [ftplib.error_temp('421 Too many connections')] * 2)
+        with self.assertRaises(ftplib.error_temp):
+            fs.glob('ftp://host/data/*')
+        self.assertEqual(len(self.sent('mlsd')), 1)
+
+    def test_mkdir_creates_missing_tail(self):
+        fs = self.make_fs(dirs={'/home/u/a'})
+        fs.mkdir('ftp://host/a/b/c')
+        self.assertEqual(self.server.made,
+                         ['/home/u/a/b/', '/home/u/a/b/c/'])
+        self.assertEqual(self.sent('cwd'), [('cwd', '/home/u/a/b/c'),
+                                            ('cwd', '/home/u/a/b'),
+                                            ('cwd', '/home/u/a')])
+
+    def test_mkdir_existing(self):
+        fs = self.make_fs(dirs={'/home/u/a', '/home/u/a/b'})
+        fs.mkdir('ftp://host/a/b')
+        self.assertEqual(self.server.made, [])
+
+    def test_cache_accepts_plain_dict(self):
+        self.server = StubFTP.server = StubServer(dirs={'/data'})
+        pool = {}
+        fs = ftp.FtpFsAccess('ftp://host/', pool, prefetch_under=0)
+        fs.netrc = None
+        self.assertTrue(fs.isdir('ftp://host/data'))
+        self.assertEqual(len(pool['host']), 1)
+
+
+class CurlTestCase(unittest.TestCase):
+    """Runs curl transfers on StubCurl and StubMulti."""
+
+    def setUp(self):
+        StubMulti.instances = []
+        self.responses = {}
+        self.curls = []
+        for patcher in (
+                mock.patch.object(ftp.pycurl, 'CurlMulti', StubMulti),
+                mock.patch.object(ftp, '_new_curl', self.new_curl)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch('builtins.print')
+        self.print = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.fs = ftp.FtpFsAccess('ftp://host/')
+
+    def new_curl(self):
+        c = StubCurl(self.responses)
+        self.curls.append(c)
+        return c
+
+
+class CurlTransferTest(CurlTestCase):
+
+    def test_multi_handle_made_on_first_transfer(self):
+        self.assertEqual(StubMulti.instances, [])
+        self.fs.perform_all()
+        self.assertEqual(StubMulti.instances, [])
+        self.responses['ftp://host/a'] = (b'abc', 226)
+        self.fs.download(io.BytesIO(), 'ftp://host/a')
+        self.fs.download(io.BytesIO(), 'ftp://host/a')
+        self.assertEqual(len(StubMulti.instances), 1)
+        if hasattr(pycurl, 'M_MAX_TOTAL_CONNECTIONS'):
+            self.assertEqual(
+                StubMulti.instances[0].options,
+                {pycurl.M_MAX_HOST_CONNECTIONS:
+                 ftp.FTP_MAX_TRANSFER_CONNECTIONS,
+                 pycurl.M_MAX_TOTAL_CONNECTIONS:
+                 ftp.FTP_MAX_TRANSFER_CONNECTIONS})
+
+    def test_perform_all_runs_queued_transfers(self):
+        self.responses['ftp://host/a'] = (b'abc', 226)
+        self.responses['ftp://host/b'] = (b'de', 226)
+        bufs = [io.BytesIO(), io.BytesIO()]
+        transfers = [self.fs.download_async(bufs[0], 'ftp://host/a'),
+                     self.fs.download_async(bufs[1], 'ftp://host/b')]
+        self.assertFalse(any(transfer.done for transfer in transfers))
+        self.fs.perform_all()
+        self.assertTrue(all(transfer.done for transfer in transfers))
+        self.assertEqual([buf.getvalue() for buf in bufs], [b'abc', b'de'])
+        self.assertTrue(all(c.closed for c in self.curls))
+        self.assertEqual(StubMulti.instances[0].handles, [])
+
+    def test_failed_transfer_raises(self):
+        transfer = self.fs.download_async(io.BytesIO(), 'ftp://host/gone')
+        with self.assertRaises(pycurl.error):
+            transfer.result()
+        self.assertIsNone(transfer.response_code)
+        self.assertTrue(self.curls[0].closed)
+        with self.assertRaises(pycurl.error):
+            self.fs.download(io.BytesIO(), 'ftp://host/gone')
+
+    def test_error_response_is_reported(self):
+        self.responses['ftp://host/a'] = (b'', 550)
+        transfer = self.fs.download_async(io.BytesIO(), 'ftp://host/a')
+        transfer.result()
+        self.assertEqual(transfer.response_code, 550)
+        self.print.assert_called_once_with(
+            'There was a problem downloading ftp://host/a (550)')
+
+
+class PrefetchTest(CurlTestCase):
+
+    def setUp(self):
+        super(PrefetchTest, self).setUp()
+        ftp._NO_MLST_HOSTS.clear()
+        patcher = mock.patch.object(ftp.ftplib, 'FTP_TLS', StubFTP)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        StubFTP.server = StubServer(
+            dirs={'/data', '/data/sub', '/other'},
+            files={'/data/a': 2, '/data/b': 2, '/data/big': 1000,
+                   '/other/c': 2})
+        self.responses.update({'ftp://host//data/a': (b'aa', 226),
+                               'ftp://host//data/b': (b'bb', 226),
+                               'ftp://host//other/c': (b'cc', 226)})
+        self.fs = ftp.FtpFsAccess('ftp://host/', prefetch_under=100)
+        self.fs.netrc = None
+
+    def test_off_by_default(self):
+        fs = ftp.FtpFsAccess('ftp://host/')
+        fs.netrc = None
+        fs.listdir('ftp://host/data')
+        self.assertEqual(self.curls, [])
+
+    def test_small_files_read_once(self):
+        self.fs.listdir('ftp://host/data')
+        self.assertEqual(sorted(self.fs._file_cache),
+                         ['ftp://host//data/a', 'ftp://host//data/b'])
+        with self.fs.open('ftp://host//data/a', 'rb') as handle:
+            self.assertEqual(handle.read(), b'aa')
+        # The whole batch ran, the copy that was read is gone
+        self.assertEqual(list(self.fs._file_cache), ['ftp://host//data/b'])
+        self.assertTrue(all(c.closed for c in self.curls))
+        self.assertEqual(self.fs._prefetched('ftp://host//data/b'), b'bb')
+        self.assertIsNone(self.fs._prefetched('ftp://host//data/a'))
+
+    def test_uploads_do_not_run_prefetch(self):
+        self.fs.listdir('ftp://host/data')
+        self.responses['ftp://host/up'] = (b'', 226)
+        self.fs.upload(io.BytesIO(b'up'), 'ftp://host/up')
+        transfer = self.fs._file_cache['ftp://host//data/a'][0]
+        self.assertFalse(transfer.done)
+
+    def test_failed_prefetch_falls_back(self):
+        self.responses['ftp://host//data/a'] = (b'', 550)
+        del self.responses['ftp://host//data/b']
+        self.fs.listdir('ftp://host/data')
+        self.assertIsNone(self.fs._prefetched('ftp://host//data/a'))
+        self.assertIsNone(self.fs._prefetched('ftp://host//data/b'))
+
+    def test_files_per_listing_are_capped(self):
+        with mock.patch.object(ftp, 'FTP_PREFETCH_MAX_FILES', 1):
+            self.fs.listdir('ftp://host/data')
+        self.assertEqual(list(self.fs._file_cache), ['ftp://host//data/a'])
+
+    def test_next_listing_drops_unread_copies(self):
+        self.fs.listdir('ftp://host/data')
+        transfer = self.fs._file_cache['ftp://host//data/a'][0]
+        self.fs.listdir('ftp://host/other')
+        self.assertEqual(list(self.fs._file_cache), ['ftp://host//other/c'])
+        self.assertTrue(StubMulti.instances[0].closed)
+        with self.assertRaises(pycurl.error):
+            transfer.result()
+        self.assertTrue(all(c.closed for c in self.curls[:2]))
+
+
+class PipeStreamTest(CurlTestCase):
+
+    def test_open_streams(self):
+        self.responses['ftp://u:p@host//a'] = (b'line 1\nline 2\n', 226)
+        with self.fs.open('ftp://u:p@host/a', 'r') as handle:
+            self.assertEqual(handle.readlines(), ['line 1\n', 'line 2\n'])
+
+    def test_failed_download_raises_at_end(self):
+        r_fd, w_fd = os.pipe()
+        reader = ftp._PipeReader(r_fd)
+        ftp._pump_to_pipe('ftp://host/gone', w_fd, reader)
+        with io.BufferedReader(reader) as handle:
+            with self.assertRaises(pycurl.error):
+                handle.read()
+        self.assertTrue(self.curls[0].closed)
+
+    def test_closed_reader_aborts_download(self):
+        self.responses['ftp://host/a'] = (b'x' * 64, 226)
+        r_fd, w_fd = os.pipe()
+        reader = ftp._PipeReader(r_fd)
+        reader.close()
+        ftp._pump_to_pipe('ftp://host/a', w_fd, reader)
+        self.assertEqual(reader.error.args[0], 23)
+        self.assertTrue(self.curls[0].closed)
+        with self.assertRaises(OSError):
+            os.fstat(w_fd)
+
+
+class AbspathTest(unittest.TestCase):
+
+    def test_urls_are_kept(self):
+        for url in ('ftp://host/a', 'http://host/a', 'https://host/a',
+                    'FTP://host/a', 'Http://host/a', 's3://bucket/a',
+                    'keep+ssh://host/a'):
+            with self.subTest(url=url):
+                self.assertEqual(ftp.abspath(url, '/base'), url)
+
+    def test_file_urls(self):
+        self.assertEqual(ftp.abspath('file:///tmp/a', '/base'), '/tmp/a')
+        self.assertEqual(ftp.abspath('FILE:///tmp/a', '/base'), '/tmp/a')
+
+    def test_paths(self):
+        self.assertEqual(ftp.abspath('/tmp/a', '/base'), '/tmp/a')
+        self.assertEqual(ftp.abspath('a', '/base'), '/base/a')
+        self.assertEqual(ftp.abspath('ftpdata/a', '/base'),
+                         '/base/ftpdata/a')
+        self.assertEqual(ftp.abspath('a', 'file:///base'),
+                         'file:///base/a')
+
+
+class LoadNetrcTest(unittest.TestCase):
+
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.home)
+        patcher = mock.patch.dict(os.environ, {'HOME': self.home})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        ftp._NETRC_CACHE.clear()
+        self.addCleanup(ftp._NETRC_CACHE.clear)
+        self.path = os.path.join(self.home, '.netrc')
+
+    def write(self, text, mtime):
+        with open(self.path, 'w') as handle:
+            handle.write(text)
+        os.utime(self.path, (mtime, mtime))
+
+    def test_missing(self):
+        self.assertIsNone(ftp._load_netrc())
+
+    def test_parsed_once_per_mtime(self):
+        self.write('machine host login u password p\n', 1000)
+        with mock.patch.object(ftp.netrc, 'netrc',
+                               wraps=ftp.netrc.netrc) as parse:
+            first = ftp._load_netrc()
+            self.assertIs(ftp._load_netrc(), first)
+            self.assertEqual(parse.call_count, 1)
+            self.assertEqual(first.authenticators('host')[0], 'u')
+            self.write('machine host login v password q\n', 2000)
+            second = ftp._load_netrc()
+            self.assertEqual(parse.call_count, 2)
+        self.assertEqual(second.authenticators('host')[0], 'v')
+        self.assertEqual(len(ftp._NETRC_CACHE), 1)
+
+    def test_parse_error_is_cached(self):
+        self.write('machine host login u password p bogus x\n', 1000)
+        with mock.patch.object(ftp.netrc, 'netrc',
+                               wraps=ftp.netrc.netrc) as parse:
+            self.assertIsNone(ftp._load_netrc())
+            self.assertIsNone(ftp._load_netrc())
+        self.assertEqual(parse.call_count, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()